@@ -0,0 +1,187 @@
+import sys
+from pathlib import Path
+# Add the parent directory to Python path to import generated prisma client
+sys.path.insert(0, str(Path(__file__).parent / "generated"))
+
+from prisma import Prisma
+import pg_store
+from pg_store import PgStore
+import asyncio
+from dotenv import load_dotenv
+import os
+import json
+import argparse
+import logging
+from datetime import date, datetime, timedelta
+import numpy as np
+from stream_rows import stream_chunks
+import data_quality
+
+logging.basicConfig(level=logging.INFO)
+
+env_path = os.path.join(os.path.dirname(__file__), '.env')
+load_dotenv(dotenv_path=env_path)
+
+# DATA_DB_DRIVER=asyncpg reads through pg_store (no query-engine process)
+db = PgStore() if pg_store.enabled() else Prisma()
+
+# SKYDELTA_CACHE_DIR moves every Data cache (e.g. to a scratch dir for tests)
+CACHE_DIR = os.getenv('SKYDELTA_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache'))
+# Small JSON file naming the current index file and the last day folded into
+# it. Replacing it is the single atomic step that publishes a new index.
+CLIMATOLOGY_PATH = os.path.join(CACHE_DIR, 'climatology.json')
+
+# Index layout: [day of year (366), hour (24), metric, stat]
+METRICS = ('temperature', 'humidity', 'pressure')
+STATS = ('mean', 'std', 'count')
+SHAPE = (366, 24, len(METRICS), len(STATS))
+MEAN, STD, COUNT = range(len(STATS))
+
+# Feb 29 has its own slot, so every other date keeps the same slot in leap
+# and non-leap years (Mar 1 is always slot 60).
+_CUM_DAYS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+def day_slot(d):
+    """Day-of-year slot (0-365) for a date, leap-year independent"""
+    return int(_CUM_DAYS[d.month - 1] + d.day - 1)
+
+
+def _read_meta(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        meta = json.load(f)
+    # Indexes written before the metadata named its file can't be trusted
+    if 'index' not in meta:
+        return None
+    return meta
+
+
+def open_index(path=CLIMATOLOGY_PATH):
+    """Memory-map the climatology index read-only, or None if it hasn't been built"""
+    meta = _read_meta(path)
+    if meta is None:
+        return None
+    return np.load(os.path.join(os.path.dirname(path), meta['index']), mmap_mode='r')
+
+
+def lookup(index, when):
+    """Seasonal baseline for a datetime: {metric: {'mean', 'std', 'count'}}"""
+    cell = index[day_slot(when), when.hour]
+    return {
+        metric: {stat: float(cell[m, s]) for s, stat in enumerate(STATS)}
+        for m, metric in enumerate(METRICS)
+    }
+
+
+def fold_in(index, slots, hours, values):
+    """Merge a batch of readings into the index in place
+
+    `slots` and `hours` are integer arrays, `values` is (n, len(METRICS)).
+    Per-cell batch statistics are combined with the stored ones using the
+    parallel variance formula, so batches can arrive in any order.
+    """
+    cell = slots * 24 + hours
+    flat = index.reshape(366 * 24, len(METRICS), len(STATS))
+    n_cells = flat.shape[0]
+
+    counts = np.bincount(cell, minlength=n_cells).astype(float)
+    touched = np.flatnonzero(counts)
+    n_b = counts[touched]
+
+    for m in range(len(METRICS)):
+        v = values[:, m]
+        cell_mean = np.bincount(cell, weights=v, minlength=n_cells) / np.maximum(counts, 1)
+        mean_b = cell_mean[touched]
+        # Sum of squared deviations from the batch mean, per cell
+        dev = v - cell_mean[cell]
+        m2_b = np.bincount(cell, weights=dev * dev, minlength=n_cells)[touched]
+
+        n_a = flat[touched, m, COUNT]
+        mean_a = flat[touched, m, MEAN]
+        m2_a = flat[touched, m, STD] ** 2 * n_a
+
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        mean = mean_a + delta * n_b / n
+        m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+
+        flat[touched, m, MEAN] = mean
+        flat[touched, m, STD] = np.sqrt(m2 / n)
+        flat[touched, m, COUNT] = n
+
+
+def _rows_to_batch(rows):
+    stamps = [r.timestamp for r in rows]
+    timestamps = np.array([t.replace(tzinfo=None) for t in stamps], dtype='datetime64[us]')
+    values = np.column_stack(data_quality.clean(
+        timestamps,
+        [r.temperature for r in rows],
+        [r.humidity for r in rows],
+        [r.pressure for r in rows],
+    ))
+    # Readings that couldn't be cleaned stay out of the baseline entirely
+    keep = np.isfinite(values).all(axis=1)
+    slots = np.array([day_slot(t) for t in stamps], dtype=np.int64)[keep]
+    hours = np.array([t.hour for t in stamps], dtype=np.int64)[keep]
+    return slots, hours, values[keep]
+
+
+async def update_index(path=CLIMATOLOGY_PATH, rebuild=False):
+    """Fold every closed day since the last update into the index"""
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    meta = None if rebuild else _read_meta(path)
+    last_day = date.fromisoformat(meta['last_day']) if meta is not None else None
+
+    # Only whole days go in, so today's partial data is never counted twice
+    today = datetime.now().date()
+    if last_day is not None and last_day >= today - timedelta(days=1):
+        logging.info(f"Climatology already up to date (last day {last_day})")
+        return
+
+    # Write a new index file next to the old one; it only becomes current
+    # once the metadata pointing at it has been swapped in
+    new_last_day = today - timedelta(days=1)
+    index_name = f"climatology-{new_last_day.isoformat()}.npy"
+    tmp_path = os.path.join(cache_dir, index_name + '.tmp.npy')
+    index = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=SHAPE)
+    if last_day is not None:
+        index[:] = np.load(os.path.join(cache_dir, meta['index']), mmap_mode='r')
+
+    where = {'timestamp': {'lt': datetime.combine(today, datetime.min.time())}}
+    if last_day is not None:
+        where['timestamp']['gte'] = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+
+    await db.connect()
+    folded = 0
+    async for slots, hours, values in stream_chunks(db, 'weather_db_v2', where=where,
+                                                    process=_rows_to_batch, prefetch=True):
+        fold_in(index, slots, hours, values)
+        folded += len(slots)
+    await db.disconnect()
+
+    index.flush()
+    del index
+    os.replace(tmp_path, os.path.join(cache_dir, index_name))
+
+    meta_tmp = path + '.tmp'
+    with open(meta_tmp, 'w') as f:
+        json.dump({'last_day': new_last_day.isoformat(), 'index': index_name}, f)
+    os.replace(meta_tmp, path)
+
+    # Older index files (and leftovers from interrupted runs) are no longer referenced
+    for name in os.listdir(cache_dir):
+        if name.startswith('climatology') and name.endswith('.npy') and name != index_name:
+            os.remove(os.path.join(cache_dir, name))
+    logging.info(f"Folded {folded} rows into climatology up to {new_last_day}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the day-of-year x hour climatology index")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild from the whole archive")
+    args = parser.parse_args()
+
+    asyncio.run(update_index(rebuild=args.rebuild))
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 from datetime import datetime, timezone, timedelta
 import os
 import pytz
+from stream_rows import stream_chunks
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -23,41 +24,46 @@ async def convert_all_timestamps_to_ist():
     """Convert all existing UTC timestamps to IST by adding 5:30 hours"""
     await db.connect()
     
-    print("Fetching all records...")
-    all_records = await db.weather_db_v2.find_many(order={'timestamp': 'asc'})
+    first_record = await db.weather_db_v2.find_first(order={'timestamp': 'asc'})
     
-    if not all_records:
+    if not first_record:
         print("No records found in database.")
         await db.disconnect()
         return
     
-    print(f"Found {len(all_records)} records to convert")
+    total = await db.weather_db_v2.count()
+    last_before = await db.weather_db_v2.find_first(order={'timestamp': 'desc'})
+    
+    print(f"Found {total} records to convert")
     print(f"\nExample timestamps BEFORE conversion:")
-    print(f"  First: {all_records[0].timestamp} (UTC)")
-    print(f"  Last:  {all_records[-1].timestamp} (UTC)")
+    print(f"  First: {first_record.timestamp} (UTC)")
+    print(f"  Last:  {last_before.timestamp} (UTC)")
     
-    # Convert each timestamp from UTC to IST by adding 5:30 hours
+    # Convert each timestamp from UTC to IST by adding 5:30 hours.
+    # Records are streamed newest first: every update moves a row later in
+    # time, i.e. behind the cursor, so no row is ever visited twice.
     updated_count = 0
-    for record in all_records:
-        # Get the UTC timestamp
-        utc_time = record.timestamp
-        
-        # If timestamp is naive (no timezone), assume it's UTC
-        if utc_time.tzinfo is None:
-            utc_time = utc_time.replace(tzinfo=timezone.utc)
-        
-        # Add 5 hours 30 minutes to convert UTC to IST
-        ist_time = utc_time + timedelta(hours=5, minutes=30)
-        
-        # Update the record with IST time (keeping the timezone info)
-        await db.weather_db_v2.update(
-            where={'id': record.id},
-            data={'timestamp': ist_time}
-        )
-        updated_count += 1
-        
-        if updated_count % 100 == 0:
-            print(f"Converted {updated_count} records...")
+    async for records in stream_chunks(db, 'weather_db_v2', descending=True):
+        for record in records:
+            # Get the UTC timestamp
+            utc_time = record.timestamp
+            
+            # If timestamp is naive (no timezone), assume it's UTC
+            if utc_time.tzinfo is None:
+                utc_time = utc_time.replace(tzinfo=timezone.utc)
+            
+            # Add 5 hours 30 minutes to convert UTC to IST
+            ist_time = utc_time + timedelta(hours=5, minutes=30)
+            
+            # Update the record with IST time (keeping the timezone info)
+            await db.weather_db_v2.update(
+                where={'id': record.id},
+                data={'timestamp': ist_time}
+            )
+            updated_count += 1
+            
+            if updated_count % 100 == 0:
+                print(f"Converted {updated_count} records...")
     
     print(f"\n✓ Successfully converted {updated_count} timestamps to IST")
     
@@ -0,0 +1,148 @@
+import warnings
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+METRICS = ('temperature', 'humidity', 'pressure')
+
+# The device has reported the same values under different keys over time
+# (Ingest/main.js reads temp_c / humidity_pct / pressure_hpa)
+KEY_ALIASES = {
+    'temperature': ('temperature', 'temp_c', 'temp'),
+    'humidity': ('humidity', 'humidity_pct'),
+    'pressure': ('pressure', 'pressure_hpa'),
+}
+
+# Physically plausible range for each metric at the station
+VALID_RANGES = {
+    'temperature': (-10.0, 60.0),
+    'humidity': (0.0, 100.0),
+    'pressure': (870.0, 1085.0),
+}
+
+# Spike rejection: a reading more than SPIKE_THRESHOLD robust sigmas from
+# the median of its SPIKE_WINDOW neighbours is dropped. MIN_MAD keeps flat
+# stretches (e.g. integer humidity) from flagging ordinary sensor noise.
+SPIKE_WINDOW = 11
+SPIKE_THRESHOLD = 5.0
+MIN_MAD = {
+    'temperature': 0.1,
+    'humidity': 0.5,
+    'pressure': 0.05,
+}
+
+# Gaps up to this long are interpolated; longer ones are left missing
+MAX_GAP = np.timedelta64(10, 'm')
+
+
+def normalize_reading(payload):
+    """Map a raw sensor payload onto temperature / humidity / pressure
+
+    Missing, non-numeric and out-of-range values come back as None.
+    """
+    reading = {}
+    for metric, aliases in KEY_ALIASES.items():
+        value = next((payload[key] for key in aliases if payload.get(key) is not None), None)
+        try:
+            value = float(value) if value is not None else None
+        except (TypeError, ValueError):
+            value = None
+        low, high = VALID_RANGES[metric]
+        if value is not None and not (low <= value <= high and np.isfinite(value)):
+            value = None
+        reading[metric] = value
+    return reading
+
+
+def reject_spikes(values, metric, window=SPIKE_WINDOW, threshold=SPIKE_THRESHOLD):
+    """NaN out readings far from their rolling median (rolling MAD test)"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        return values.copy()
+
+    half = window // 2
+    windows = sliding_window_view(np.pad(values, half, mode='reflect'), window)
+    # All-NaN windows just produce NaN (and a warning we don't need)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(windows, axis=1)
+        mad = np.nanmedian(np.abs(windows - median[:, None]), axis=1)
+    scale = 1.4826 * np.maximum(np.nan_to_num(mad), MIN_MAD[metric])
+
+    cleaned = values.copy()
+    cleaned[np.abs(values - median) > threshold * scale] = np.nan
+    return cleaned
+
+
+def fill_gaps(timestamps, values, max_gap=MAX_GAP):
+    """Linearly interpolate NaNs in time, only across gaps no longer than max_gap
+
+    With max_gap=None every NaN is filled (edges take the nearest value),
+    which is what the plots want.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(values)
+    if valid.all() or not valid.any():
+        return values.copy()
+
+    t = np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64)
+    filled = np.interp(t, t[valid], values[valid])
+    if max_gap is None:
+        return filled
+
+    # Time between the valid readings either side of each sample
+    idx = np.flatnonzero(valid)
+    after = np.searchsorted(idx, np.arange(len(values)))
+    before = after - 1
+    inside = (before >= 0) & (after < len(idx))
+    span = np.full(len(values), np.iinfo(np.int64).max)
+    span[inside] = t[idx[after[inside]]] - t[idx[before[inside]]]
+
+    max_gap_us = max_gap.astype('timedelta64[us]').astype(np.int64)
+    return np.where(valid | (span <= max_gap_us), filled, np.nan)
+
+
+def clean_series(timestamps, values, metric, max_gap=MAX_GAP):
+    """Range check, spike rejection and gap-aware interpolation for one metric"""
+    values = np.asarray(values, dtype=float).copy()
+    low, high = VALID_RANGES[metric]
+    with np.errstate(invalid='ignore'):
+        values[~((values >= low) & (values <= high))] = np.nan
+    values = reject_spikes(values, metric)
+    return fill_gaps(timestamps, values, max_gap)
+
+
+def clean(timestamps, temps, humis, press, max_gap=MAX_GAP):
+    """Clean aligned weather_db_v2 arrays; unrecoverable readings are NaN"""
+    return tuple(
+        clean_series(timestamps, values, metric, max_gap)
+        for values, metric in zip((temps, humis, press), METRICS)
+    )
+
+
+def hourly_average(timestamps, temps, humis, press):
+    """NaN-aware hour-of-day means in the same shape as the old get_hourly_average()
+
+    An hour is kept if any metric has data in it; a metric without data in
+    that hour is None, so one dead sensor doesn't hide the others.
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+    hours = timestamps.astype('datetime64[h]').astype(np.int64) % 24
+
+    means = {}
+    counts = None
+    for key, values in (('avg_temp', temps), ('avg_humidity', humis), ('avg_pressure', press)):
+        values = np.asarray(values, dtype=float)
+        ok = np.isfinite(values)
+        n = np.bincount(hours[ok], minlength=24)
+        total = np.bincount(hours[ok], weights=values[ok], minlength=24)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[key] = total / n
+        counts = n if counts is None else np.maximum(counts, n)
+
+    hourly_avg = {}
+    for hour in np.flatnonzero(counts):
+        hourly_avg[int(hour)] = {
+            key: float(m[hour]) if np.isfinite(m[hour]) else None for key, m in means.items()
+        }
+    return hourly_avg
+
@@ -0,0 +1,74 @@
+import numpy as np
+
+# Pressure tendency is the change over this window (the usual synoptic 3 hours)
+TENDENCY_WINDOW = np.timedelta64(3, 'h')
+# How far the reading at the start of the window may be from the exact time
+TENDENCY_TOLERANCE = np.timedelta64(10, 'm')
+
+
+def dew_point(temp_c, rh):
+    """Dew point in °C (Magnus formula)"""
+    temp_c = np.asarray(temp_c, dtype=float)
+    rh = np.clip(np.asarray(rh, dtype=float), 1e-3, 100)
+    a, b = 17.62, 243.12
+    gamma = np.log(rh / 100) + a * temp_c / (b + temp_c)
+    return b * gamma / (a - gamma)
+
+
+def heat_index(temp_c, rh):
+    """Heat index in °C (NOAA Rothfusz regression with its low/high RH adjustments)"""
+    temp_c = np.asarray(temp_c, dtype=float)
+    rh = np.asarray(rh, dtype=float)
+    t = temp_c * 9 / 5 + 32
+
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+
+    full = (-42.379 + 2.04901523 * t + 10.14333127 * rh
+            - 0.22475541 * t * rh - 6.83783e-3 * t * t
+            - 5.481717e-2 * rh * rh + 1.22874e-3 * t * t * rh
+            + 8.5282e-4 * t * rh * rh - 1.99e-6 * t * t * rh * rh)
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    full = np.where(dry, full - (13 - rh) / 4 * np.sqrt(np.maximum(17 - np.abs(t - 95), 0) / 17), full)
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    full = np.where(humid, full + (rh - 85) / 10 * (87 - t) / 5, full)
+
+    # The regression only applies once the simple estimate (already averaged
+    # with the temperature above) reaches 80 °F
+    hi = np.where(simple >= 80, full, simple)
+    return (hi - 32) * 5 / 9
+
+
+def absolute_humidity(temp_c, rh):
+    """Absolute humidity in g/m³"""
+    temp_c = np.asarray(temp_c, dtype=float)
+    rh = np.asarray(rh, dtype=float)
+    saturation_hpa = 6.112 * np.exp(17.67 * temp_c / (temp_c + 243.5))
+    return saturation_hpa * rh * 2.1674 / (273.15 + temp_c)
+
+
+def pressure_tendency(timestamps, pressure):
+    """Pressure change in hPa over the last TENDENCY_WINDOW at every reading
+
+    `timestamps` must be sorted datetime64. Readings with no sample close to
+    the start of their window get NaN.
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+    pressure = np.asarray(pressure, dtype=float)
+    if not len(timestamps):
+        return np.array([])
+
+    start = timestamps - TENDENCY_WINDOW
+    idx = np.searchsorted(timestamps, start)
+    idx = np.minimum(idx, len(timestamps) - 1)
+    ok = np.abs(timestamps[idx] - start) <= TENDENCY_TOLERANCE
+    return np.where(ok, pressure - pressure[idx], np.nan)
+
+
+def derive(timestamps, temps, humis, press):
+    """Every derived series for aligned weather_db_v2 arrays"""
+    return {
+        'dew_point': dew_point(temps, humis),
+        'heat_index': heat_index(temps, humis),
+        'absolute_humidity': absolute_humidity(temps, humis),
+        'pressure_tendency': pressure_tendency(timestamps, press),
+    }
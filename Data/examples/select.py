@@ -2,11 +2,13 @@ import sys
 from pathlib import Path
 # Add the parent directory to Python path to import generated prisma client
 sys.path.insert(0, str(Path(__file__).parent.parent / "generated"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from prisma import Prisma
 import asyncio
 from dotenv import load_dotenv
 import os
+from stream_rows import stream_rows
 
 # Load environment variables from parent directory's .env file
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
@@ -17,8 +19,7 @@ db = Prisma()
 
 async def main():
     await db.connect()
-    rows = await db.weather_db_v2.find_many()
-    for row in rows:
+    async for row in stream_rows(db, 'weather_db_v2', prefetch=True):
         print(row.id, row.temperature, row.humidity, row.pressure, row.timestamp)
     await db.disconnect()
 
@@ -4,22 +4,31 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "generated"))
 
 from prisma import Prisma
+import pg_store
+from pg_store import PgStore
 import asyncio
 from dotenv import load_dotenv
 import os
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 import numpy as np
 from scipy.interpolate import make_interp_spline
 from scipy.ndimage import gaussian_filter1d
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+from urllib.parse import urlsplit
+from stream_rows import stream_chunks, stream_rows
+import derived_metrics
+import data_quality
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path=env_path)
 
-db = Prisma()
+# DATA_DB_DRIVER=asyncpg reads through pg_store (no query-engine process)
+db = PgStore() if pg_store.enabled() else Prisma()
 
 # IST Offset
 IST_OFFSET = timedelta(hours=5, minutes=30)
@@ -28,8 +37,90 @@ def utc_to_ist(dt):
     """Convert UTC datetime to IST"""
     return dt + IST_OFFSET
 
-async def fetch_today_data():
-    """Fetch weather data from 7 AM IST today to now"""
+# Today's rows persist between runs so each run only fetches what is new.
+# SKYDELTA_CACHE_DIR moves every Data cache (e.g. to a scratch dir for tests)
+CACHE_DIR = os.getenv('SKYDELTA_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache'))
+TODAY_BUFFER_PATH = os.path.join(CACHE_DIR, 'today_buffer.npz')
+TODAY_METRICS = ('temp', 'humidity', 'pressure')
+# Gaussian sigma of the "Today" overlay on the monthly plots
+OVERLAY_SIGMA = 4
+# Series from derived_metrics.derive() plotted for today: key, label, file
+DERIVED_PLOTS = (
+    ('dew_point', 'Dew Point (°C)', 'today_dew_point.png'),
+    ('heat_index', 'Heat Index (°C)', 'today_heat_index.png'),
+    ('absolute_humidity', 'Abs. Humidity (g/m³)', 'today_abs_humidity.png'),
+    ('pressure_tendency', 'Pressure Tendency (hPa/3h)', 'today_pressure_tendency.png'),
+)
+
+def _empty_today_buffer(day):
+    buffer = {'day': day, 'cursor': None, 'ist': np.array([], dtype='datetime64[us]')}
+    for metric in TODAY_METRICS:
+        buffer[metric] = np.array([])
+        buffer[f'{metric}_display'] = np.array([])
+        buffer[f'{metric}_filtered'] = np.array([])
+    return buffer
+
+def _db_identity():
+    """host:port/database of DATABASE_URL, without credentials"""
+    parts = urlsplit(os.getenv('DATABASE_URL', ''))
+    return f"{parts.hostname}:{parts.port}{parts.path}"
+
+def load_today_buffer(day, path=TODAY_BUFFER_PATH):
+    """Load the persisted today-buffer, or start a new one if it belongs to another day"""
+    if not os.path.exists(path):
+        return _empty_today_buffer(day)
+    
+    with np.load(path) as f:
+        if str(f['day']) != day.isoformat():
+            print(f"Resetting today buffer (was {f['day']})")
+            return _empty_today_buffer(day)
+        # The cursor only makes sense against the database it came from
+        if 'source' not in f.files or str(f['source']) != _db_identity():
+            print("Resetting today buffer (built against another database)")
+            return _empty_today_buffer(day)
+        if not all(key in f.files for key in _empty_today_buffer(day)
+                   if key not in ('day', 'cursor')):
+            print("Resetting today buffer (old format)")
+            return _empty_today_buffer(day)
+        buffer = {key: f[key] for key in f.files if key not in ('day', 'source', 'cursor_ts', 'cursor_id')}
+        buffer['cursor'] = (datetime.fromisoformat(str(f['cursor_ts'])), str(f['cursor_id']))
+    buffer['day'] = day
+    return buffer
+
+def save_today_buffer(buffer, path=TODAY_BUFFER_PATH):
+    if buffer['cursor'] is None:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    arrays = {key: value for key, value in buffer.items() if key not in ('day', 'cursor')}
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, day=buffer['day'].isoformat(), source=_db_identity(),
+             cursor_ts=buffer['cursor'][0].isoformat(), cursor_id=buffer['cursor'][1], **arrays)
+    os.replace(tmp_path, path)
+
+def smooth_tail(y, filtered, sigma, changed_from=None, truncate=4.0):
+    """Update a gaussian_filter1d result after y changed from `changed_from` on
+
+    By default only new points were appended. Outputs more than `radius`
+    before the first change (and before the old, reflected end boundary)
+    are unaffected, so only the rest is recomputed, from a window just wide
+    enough to give the same values as filtering all of y.
+    """
+    n_old = len(filtered)
+    changed_from = n_old if changed_from is None else min(changed_from, n_old)
+    if changed_from == 0:
+        return gaussian_filter1d(y, sigma=sigma, truncate=truncate)
+    if changed_from == n_old == len(y):
+        return filtered
+    
+    radius = int(truncate * sigma + 0.5)
+    start = max(0, changed_from - radius)
+    window_start = max(0, start - radius)
+    tail = gaussian_filter1d(y[window_start:], sigma=sigma, truncate=truncate)[start - window_start:]
+    return np.concatenate([filtered[:start], tail])
+
+async def fetch_today_data(after=None):
+    """Fetch weather data from 7 AM IST today to now, resuming after the cursor if given"""
     await db.connect()
     
     now_utc = datetime.now(timezone.utc).replace(tzinfo=None) # Prisma returns naive UTC
@@ -39,22 +130,52 @@ async def fetch_today_data():
     today_7am_ist = now_ist.replace(hour=7, minute=0, second=0, microsecond=0)
     today_7am_utc = today_7am_ist - IST_OFFSET
     
-    print(f"Fetching today's data from {today_7am_utc} UTC (7 AM IST) to now")
+    if after is None:
+        print(f"Fetching today's data from {today_7am_utc} UTC (7 AM IST) to now")
+    else:
+        print(f"Fetching today's data after {after[0]}")
     
-    rows = await db.weather_db_v2.find_many(
-        where={
-            'timestamp': {
-                'gte': today_7am_utc
-            }
-        },
-        order={
-            'timestamp': 'asc'
-        }
-    )
+    rows = [
+        row async for row in stream_rows(
+            db, 'weather_db_v2',
+            where={'timestamp': {'gte': today_7am_utc}},
+            after=after,
+        )
+    ]
     
     await db.disconnect()
     return rows
 
+async def refresh_today_buffer(path=TODAY_BUFFER_PATH):
+    """Append rows newer than the buffer's cursor and extend the smoothed overlay"""
+    now_ist = utc_to_ist(datetime.now(timezone.utc).replace(tzinfo=None))
+    buffer = load_today_buffer(now_ist.date(), path)
+    
+    rows = await fetch_today_data(after=buffer['cursor'])
+    print(f"{len(rows)} new rows, {len(buffer['ist']) + len(rows)} today")
+    if rows:
+        new_ist, new_temp, new_humi, new_press = _rows_to_arrays(rows)
+        buffer['ist'] = np.concatenate([buffer['ist'], new_ist])
+        for metric, quality_metric, values in zip(TODAY_METRICS, data_quality.METRICS,
+                                                  (new_temp, new_humi, new_press)):
+            buffer[metric] = np.concatenate([buffer[metric], values])
+            
+            # Cleaning looks a few samples ahead, so the end of the old
+            # display series can change too; refilter from the first change
+            old_display = buffer[f'{metric}_display']
+            display = data_quality.fill_gaps(
+                buffer['ist'], data_quality.clean_series(buffer['ist'], buffer[metric], quality_metric), None
+            )
+            differs = display[:len(old_display)] != old_display
+            changed_from = int(np.argmax(differs)) if differs.any() else len(old_display)
+            
+            buffer[f'{metric}_display'] = display
+            buffer[f'{metric}_filtered'] = smooth_tail(display, buffer[f'{metric}_filtered'],
+                                                       OVERLAY_SIGMA, changed_from)
+        buffer['cursor'] = (rows[-1].timestamp, rows[-1].id)
+        save_today_buffer(buffer, path)
+    return buffer
+
 async def fetch_last_30_days_data():
     """Fetch weather data from the last 30 days"""
     await db.connect()
@@ -78,31 +199,10 @@ async def fetch_last_30_days_data():
     await db.disconnect()
     return rows
 
-def get_hourly_average(data):
-    """Calculate hourly averages from data (logic from hourly-trends.py)"""
-    avg = defaultdict(lambda : {"temp" :[], "humidity":[], "pressure": []})
-    for d in data:
-        # Convert to IST for hour grouping
-        dt_ist = utc_to_ist(d.timestamp)
-        hour = dt_ist.hour
-        avg[hour]["temp"].append(d.temperature)
-        avg[hour]["humidity"].append(d.humidity)
-        avg[hour]["pressure"].append(d.pressure)
-        
-    hourly_avg = {}
-    for hour in range(24):
-        if hour in avg and avg[hour]["temp"]:
-            hourly_avg[hour] = {
-                "avg_temp" : sum(avg[hour]["temp"]) / len(avg[hour]["temp"]),
-                "avg_humidity" :sum(avg[hour]["humidity"]) / len(avg[hour]["humidity"]),
-                "avg_pressure" : sum(avg[hour]["pressure"]) / len(avg[hour]["pressure"]),
-            }
-    return hourly_avg
-
-def smooth_data(x, y, sigma=2):
+def smooth_data(x, y, sigma=2, prefiltered=False):
     """Apply Gaussian smoothing and spline interpolation"""
-    # First apply Gaussian filter to reduce noise
-    y_filtered = gaussian_filter1d(y, sigma=sigma)
+    # First apply Gaussian filter to reduce noise (unless the caller already did)
+    y_filtered = y if prefiltered else gaussian_filter1d(y, sigma=sigma)
     
     # Then apply spline interpolation for visual smoothness
     if len(x) >= 4:
@@ -143,13 +243,27 @@ def get_trend_text(y_values, unit, type_name):
         
     return f"{status} {type_name}"
 
+def _finite_points(x_values, y_values, filtered=None):
+    """Drop points whose value is NaN/inf (e.g. a whole series rejected by data_quality)"""
+    keep = np.isfinite(np.asarray(y_values, dtype=float))
+    if keep.all():
+        return x_values, y_values, filtered
+    x_values = [x for x, k in zip(x_values, keep) if k]
+    y_values = np.asarray(y_values, dtype=float)[keep]
+    if filtered is not None:
+        filtered = np.asarray(filtered, dtype=float)[keep]
+    return x_values, y_values, filtered
+
 def create_smooth_plot(x_values, y_values, ylabel, filename, output_dir, is_time=True, 
                       overlay_x=None, overlay_y=None, overlay_label=None, extra_smooth=False,
-                      unit="", type_name=""):
+                      unit="", type_name="", overlay_filtered=None):
     """Create a smooth, centered plot with optional overlay, optimized for E-Paper"""
+    x_values, y_values, _ = _finite_points(x_values, y_values)
     if len(x_values) < 2:
         print(f"Not enough data points for {ylabel}")
         return
+    if overlay_x is not None:
+        overlay_x, overlay_y, overlay_filtered = _finite_points(overlay_x, overlay_y, overlay_filtered)
     
     # E-Paper Resolution: 1448 x 1072 (Landscape)
     dpi = 100
@@ -182,11 +296,17 @@ def create_smooth_plot(x_values, y_values, ylabel, filename, output_dir, is_time
              ox = np.array(overlay_x)
         oy = np.array(overlay_y)
         
-        # Smooth Overlay Data
-        ox_smooth, oy_smooth = smooth_data(ox, oy, sigma=4)
-        
-        # Plot Overlay Line (Today) - Solid Black
-        ax.plot(ox_smooth, oy_smooth, linewidth=5, color='black', label='Today')
+        if len(ox):
+            # Smooth Overlay Data
+            if overlay_filtered is not None:
+                ox_smooth, oy_smooth = smooth_data(ox, np.asarray(overlay_filtered), prefiltered=True)
+            else:
+                ox_smooth, oy_smooth = smooth_data(ox, oy, sigma=OVERLAY_SIGMA)
+            
+            # Plot Overlay Line (Today) - Solid Black
+            ax.plot(ox_smooth, oy_smooth, linewidth=5, color='black', label='Today')
+        else:
+            print(f"No usable data for today's {ylabel} overlay")
         
         # Legend - Large Text
         ax.legend(frameon=False, fontsize=24, loc='upper left')
@@ -238,85 +358,213 @@ def create_smooth_plot(x_values, y_values, ylabel, filename, output_dir, is_time
     plt.close()
     print(f"✓ Saved {filename}")
 
-async def main():
-    # Output directory
-    output_dir = os.path.expanduser("~/Desktop/Code/Clock/fetch_avg/plots")
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # --- Fetch Data ---
-    print("Fetching data...")
-    today_rows = await fetch_today_data()
-    month_rows = await fetch_last_30_days_data()
-    
-    # Process Today's Data
-    today_timestamps = []
-    today_temps = []
-    today_humis = []
-    today_press = []
-    today_hours_float = [] 
-    
-    if today_rows:
-        for row in today_rows:
-            dt_ist = utc_to_ist(row.timestamp)
-            today_timestamps.append(dt_ist)
-            today_temps.append(row.temperature)
-            today_humis.append(row.humidity)
-            today_press.append(row.pressure)
-            today_hours_float.append(dt_ist.hour + dt_ist.minute/60 + dt_ist.second/3600)
+def render_plots(today_timestamps, today_temps, today_humis, today_press, today_hours_float,
+                 hourly_avgs, current_hour, output_dir, today_filtered=None):
+    """Render today's trends and the monthly average overlays into output_dir
 
+    `today_filtered` optionally holds the already-smoothed overlay for each
+    of TODAY_METRICS, so it isn't filtered again here.
+    """
+    today_filtered = today_filtered or {}
     # --- Part 1: Today's Trends (Smoother) ---
     print("\n--- Generating Today's Trends ---")
     if today_timestamps:
         create_smooth_plot(today_timestamps, today_temps, 'Temperature (°C)', 'today_temp.png', output_dir, extra_smooth=True)
         create_smooth_plot(today_timestamps, today_humis, 'Humidity (%)', 'today_humi.png', output_dir, extra_smooth=True)
         create_smooth_plot(today_timestamps, today_press, 'Pressure (hPa)', 'today_pressure.png', output_dir, extra_smooth=True)
+        derived = derived_metrics.derive(np.array(today_timestamps, dtype='datetime64[us]'),
+                                         today_temps, today_humis, today_press)
+        for key, ylabel, filename in DERIVED_PLOTS:
+            create_smooth_plot(today_timestamps, derived[key], ylabel, filename, output_dir, extra_smooth=True)
     else:
         print("No data found for today.")
 
     # --- Part 2: Monthly Average Trends (Hourly) with Overlay ---
     print("\n--- Generating Monthly Average Trends ---")
-    if month_rows:
-        hourly_avgs = get_hourly_average(month_rows)
-        
-        now_ist = utc_to_ist(datetime.now(timezone.utc).replace(tzinfo=None))
-        current_hour = now_ist.hour
-        
+    if hourly_avgs:
         target_hours = list(range(7, current_hour + 1)) if current_hour >= 7 else []
         
         if not target_hours and current_hour < 7:
              target_hours = list(range(7, 24))
 
         if target_hours:
-            plot_hours = []
-            avg_temps = []
-            avg_humis = []
-            avg_press = []
-            
-            for h in target_hours:
-                if h in hourly_avgs:
-                    plot_hours.append(h)
-                    avg_temps.append(hourly_avgs[h]['avg_temp'])
-                    avg_humis.append(hourly_avgs[h]['avg_humidity'])
-                    avg_press.append(hourly_avgs[h]['avg_pressure'])
-            
-            if plot_hours:
-                create_smooth_plot(plot_hours, avg_temps, 'Avg Temp (°C)', 'month_avg_temp.png', output_dir, 
-                                 is_time=False, overlay_x=today_hours_float, overlay_y=today_temps, overlay_label='Today', 
-                                 unit='°C', type_name='Temp')
-                                 
-                create_smooth_plot(plot_hours, avg_humis, 'Avg Humidity (%)', 'month_avg_humi.png', output_dir, 
-                                 is_time=False, overlay_x=today_hours_float, overlay_y=today_humis, overlay_label='Today', 
-                                 unit='%', type_name='Humidity')
-                                 
-                create_smooth_plot(plot_hours, avg_press, 'Avg Pressure (hPa)', 'month_avg_pressure.png', output_dir, 
-                                 is_time=False, overlay_x=today_hours_float, overlay_y=today_press, overlay_label='Today', 
-                                 unit='hPa', type_name='Pressure')
-            else:
-                print("No average data available for the target hours.")
+            plots = (
+                ('avg_temp', 'Avg Temp (°C)', 'month_avg_temp.png', today_temps, 'temp', '°C', 'Temp'),
+                ('avg_humidity', 'Avg Humidity (%)', 'month_avg_humi.png', today_humis, 'humidity', '%', 'Humidity'),
+                ('avg_pressure', 'Avg Pressure (hPa)', 'month_avg_pressure.png', today_press, 'pressure', 'hPa', 'Pressure'),
+            )
+            for key, ylabel, filename, today_values, metric, unit, type_name in plots:
+                # Hours where this metric had no usable data are None; skip just those
+                plot_hours = [h for h in target_hours if h in hourly_avgs and hourly_avgs[h][key] is not None]
+                if not plot_hours:
+                    print(f"No average data available for {ylabel} in the target hours.")
+                    continue
+                create_smooth_plot(plot_hours, [hourly_avgs[h][key] for h in plot_hours], ylabel, filename, output_dir, 
+                                 is_time=False, overlay_x=today_hours_float, overlay_y=today_values, overlay_label='Today', 
+                                 overlay_filtered=today_filtered.get(metric), 
+                                 unit=unit, type_name=type_name)
         else:
             print("No target hours determined.")
     else:
         print("No data found for the last 30 days.")
 
+async def main(output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # --- Fetch Data ---
+    print("Fetching data...")
+    today = await refresh_today_buffer()
+    month_rows = await fetch_last_30_days_data()
+    
+    # Process Today's Data (cleaned, gaps filled for display)
+    today_timestamps = today['ist'].tolist()
+    today_temps = today['temp_display']
+    today_humis = today['humidity_display']
+    today_press = today['pressure_display']
+    today_hours_float = (today['ist'] - today['ist'].astype('datetime64[D]')) / np.timedelta64(1, 'h')
+    today_filtered = {metric: today[f'{metric}_filtered'] for metric in TODAY_METRICS}
+
+    hourly_avgs = {}
+    if month_rows:
+        month_ist, month_temps, month_humis, month_press = _rows_to_arrays(month_rows)
+        hourly_avgs = data_quality.hourly_average(
+            month_ist, *data_quality.clean(month_ist, month_temps, month_humis, month_press)
+        )
+    now_ist = utc_to_ist(datetime.now(timezone.utc).replace(tzinfo=None))
+    
+    render_plots(today_timestamps, today_temps, today_humis, today_press, today_hours_float,
+                 hourly_avgs, now_ist.hour, output_dir, today_filtered=today_filtered)
+
+# --- Historical Backfill ---
+
+# Preloaded arrays shared with every backfill worker (set by the pool initializer)
+_backfill = {}
+
+def _rows_to_arrays(rows):
+    """Turn a page of weather_db_v2 rows into IST timestamp and metric arrays"""
+    return (
+        np.array([utc_to_ist(r.timestamp.replace(tzinfo=None)) for r in rows], dtype='datetime64[us]'),
+        np.array([r.temperature for r in rows], dtype=float),
+        np.array([r.humidity for r in rows], dtype=float),
+        np.array([r.pressure for r in rows], dtype=float),
+    )
+
+async def load_range_arrays(start_utc, end_utc):
+    """Stream weather rows in [start_utc, end_utc) into contiguous numpy arrays"""
+    await db.connect()
+    
+    print(f"Preloading data from {start_utc} to {end_utc} UTC")
+    
+    pages = [
+        page async for page in stream_chunks(
+            db, 'weather_db_v2',
+            where={'timestamp': {'gte': start_utc, 'lt': end_utc}},
+            process=_rows_to_arrays,
+            prefetch=True,
+        )
+    ]
+    
+    await db.disconnect()
+    
+    if not pages:
+        return {
+            'ist': np.array([], dtype='datetime64[us]'),
+            'temp': np.array([]),
+            'humidity': np.array([]),
+            'pressure': np.array([]),
+        }
+    
+    ist, temps, humis, press = (np.concatenate(parts) for parts in zip(*pages))
+    print(f"Preloaded {len(ist)} rows")
+    return {'ist': ist, 'temp': temps, 'humidity': humis, 'pressure': press}
+
+def _init_backfill_worker(arrays, output_dir, force):
+    _backfill['arrays'] = arrays
+    _backfill['output_dir'] = output_dir
+    _backfill['force'] = force
+
+def render_day(day):
+    """Render one day's plot set and baseline snapshot as if it were 23:59 IST that day"""
+    arrays = _backfill['arrays']
+    day_dir = os.path.join(_backfill['output_dir'], day.isoformat())
+    baseline_path = os.path.join(day_dir, 'baseline.json')
+    
+    # The baseline snapshot is written last, so its presence marks a finished day
+    if os.path.exists(baseline_path) and not _backfill['force']:
+        return day, 'skipped'
+    os.makedirs(day_dir, exist_ok=True)
+    
+    ist = arrays['ist']
+    day_start = np.datetime64(day) + np.timedelta64(7, 'h')
+    day_end = np.datetime64(day) + np.timedelta64(1, 'D')
+    now = day_end - np.timedelta64(1, 's')
+    
+    t0, t1 = np.searchsorted(ist, [day_start, day_end])
+    m0 = np.searchsorted(ist, now - np.timedelta64(30, 'D'))
+    
+    today_ist = ist[t0:t1]
+    today_hours_float = (today_ist - today_ist.astype('datetime64[D]')) / np.timedelta64(1, 'h')
+    
+    hourly_avgs = data_quality.hourly_average(
+        ist[m0:t1], arrays['temp'][m0:t1], arrays['humidity'][m0:t1], arrays['pressure'][m0:t1]
+    )
+    
+    today_temps, today_humis, today_press = (
+        data_quality.fill_gaps(today_ist, arrays[metric][t0:t1], None)
+        for metric in ('temp', 'humidity', 'pressure')
+    )
+    render_plots(today_ist.tolist(), today_temps, today_humis, today_press,
+                 today_hours_float, hourly_avgs, 23, day_dir)
+    
+    snapshot = {
+        'day': day.isoformat(),
+        'today_rows': int(t1 - t0),
+        'month_rows': int(t1 - m0),
+        'hourly_avg': {str(h): v for h, v in hourly_avgs.items()},
+    }
+    tmp_path = baseline_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, baseline_path)
+    return day, 'rendered'
+
+def backfill(start_day, end_day, output_dir, workers=None, force=False):
+    """Render every day in [start_day, end_day] across a process pool"""
+    output_dir = os.path.join(output_dir, 'backfill')
+    os.makedirs(output_dir, exist_ok=True)
+    
+    days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+    if not force:
+        days = [d for d in days
+                if not os.path.exists(os.path.join(output_dir, d.isoformat(), 'baseline.json'))]
+    if not days:
+        print("All days already rendered.")
+        return
+    
+    # One query covers every day plus the 30-day window before the first one
+    start_utc = datetime.combine(days[0] - timedelta(days=30), datetime.min.time()) - IST_OFFSET
+    end_utc = datetime.combine(days[-1] + timedelta(days=1), datetime.min.time()) - IST_OFFSET
+    arrays = asyncio.run(load_range_arrays(start_utc, end_utc))
+    arrays['temp'], arrays['humidity'], arrays['pressure'] = data_quality.clean(
+        arrays['ist'], arrays['temp'], arrays['humidity'], arrays['pressure']
+    )
+    
+    print(f"Rendering {len(days)} days with {workers or os.cpu_count()} workers")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_backfill_worker,
+                             initargs=(arrays, output_dir, force)) as pool:
+        for day, status in pool.map(render_day, days):
+            print(f"✓ {day} {status}")
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Render today vs 30-day average plots")
+    parser.add_argument('--output-dir', default=os.path.expanduser("~/Desktop/Code/Clock/fetch_avg/plots"))
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'),
+                        type=date.fromisoformat, help="render every IST day in this range (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, default=None, help="backfill process count")
+    parser.add_argument('--force', action='store_true', help="re-render days that already exist")
+    args = parser.parse_args()
+    
+    if args.backfill:
+        backfill(*args.backfill, args.output_dir, workers=args.workers, force=args.force)
+    else:
+        asyncio.run(main(args.output_dir))
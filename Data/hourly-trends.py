@@ -4,15 +4,20 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "generated"))
 
 from prisma import Prisma
+import pg_store
+from pg_store import PgStore
 import asyncio
 from dotenv import load_dotenv
 import os
 from datetime import datetime, timedelta
-from collections import defaultdict
 import logging
-import requests
+import httpx
 import json
 from redis.asyncio import Redis
+import numpy as np
+import climatology
+import derived_metrics
+import data_quality
 
 logging.basicConfig(level=logging.INFO)
 
@@ -20,7 +25,13 @@ env_path = os.path.join(os.path.dirname(__file__), '.env')
 
 load_dotenv(dotenv_path=env_path)
 
-db = Prisma()
+# DATA_DB_DRIVER=asyncpg reads through pg_store (no query-engine process)
+db = PgStore() if pg_store.enabled() else Prisma()
+
+# Readings come from the local sensor proxy (sensor_proxy.py); the device
+# itself is only hit directly if the proxy isn't running.
+SENSOR_PROXY_URL = os.getenv('SENSOR_PROXY_URL', 'http://127.0.0.1:8050/sensors_v2')
+SENSOR_DEVICE_URL = os.getenv('SENSORS_V2_URL', 'http://192.168.1.50/sensors_v2')
 
 async def load_last_30_days_data():
     await db.connect()
@@ -40,46 +51,60 @@ async def load_last_30_days_data():
     return data
 
 
-async def get_hourly_average(data):
-    avg = defaultdict(lambda : {"temp" :[], "humidity":[], "pressure": []})
-    for d in data:
-        hour = d.timestamp.hour
-        avg[hour]["temp"].append(d.temperature)
-        avg[hour]["humidity"].append(d.humidity)
-        avg[hour]["pressure"].append(d.pressure)
-    hourly_avg = {}
-    for hour in range(24):
-        if hour in avg and avg[hour]["temp"]:
-            hourly_avg[hour] = {
-                "avg_temp" : sum(avg[hour]["temp"]) / len(avg[hour]["temp"]),
-                "avg_humidity" :sum(avg[hour]["humidity"]) / len(avg[hour]["humidity"]),
-                "avg_pressure" : sum(avg[hour]["pressure"]) / len(avg[hour]["pressure"]),
-            }
-    return hourly_avg
+def rows_to_arrays(data):
+    """Column arrays for weather_db_v2 rows, cleaned once before any aggregation"""
+    timestamps = np.array([d.timestamp.replace(tzinfo=None) for d in data], dtype='datetime64[us]')
+    temps, humis, press = data_quality.clean(
+        timestamps,
+        np.array([d.temperature for d in data], dtype=float),
+        np.array([d.humidity for d in data], dtype=float),
+        np.array([d.pressure for d in data], dtype=float),
+    )
+    return timestamps, temps, humis, press
 
-def fetch_data():
-    data = requests.get("http://192.168.1.50/sensors_v2", timeout=2)
+async def fetch_data():
+    """Latest device reading, via the proxy if it can serve one; raises if neither can"""
+    async with httpx.AsyncClient(timeout=2) as client:
+        try:
+            data = await client.get(SENSOR_PROXY_URL)
+            data.raise_for_status()
+        except httpx.HTTPError as e:
+            logging.warning(f"Sensor proxy failed ({e}), reading the device directly")
+            data = await client.get(SENSOR_DEVICE_URL)
+            data.raise_for_status()
     return data.json()
 
-def calcn_change(data_now, avg):
-    h = datetime.now().hour
-    temp_now = data_now.get('temp_c')
-    humi_now = data_now.get('humidity')
-    press_now = data_now.get('pressure')
+def seasonal_change(value, baseline):
+    """Difference from the climatology mean, and how many stds away it is"""
+    if value is None or not baseline['count']:
+        return None, None
+    change = value - baseline['mean']
+    zscore = change / baseline['std'] if baseline['std'] else None
+    return change, zscore
+
+def calcn_change(reading, avg, climatology_index=None):
+    now = datetime.now()
+    h = now.hour
+    temp_now = reading['temperature']
+    humi_now = reading['humidity']
+    press_now = reading['pressure']
     
     if h not in avg:
         return None  # or handle appropriately
     
-    change_temp = (temp_now - avg[h]["avg_temp"]) if temp_now is not None else None
-    percent_change_temp = (change_temp / avg[h]["avg_temp"] * 100) if change_temp is not None else None
+    # A metric with no usable history this hour (avg None) is skipped like a missing reading
+    avg_temp, avg_humi, avg_press = avg[h]["avg_temp"], avg[h]["avg_humidity"], avg[h]["avg_pressure"]
     
-    change_humi = (humi_now - avg[h]["avg_humidity"]) if humi_now is not None else None
-    percent_change_humi = (change_humi / avg[h]["avg_humidity"] * 100) if change_humi is not None else None
+    change_temp = (temp_now - avg_temp) if temp_now is not None and avg_temp is not None else None
+    percent_change_temp = (change_temp / avg_temp * 100) if change_temp is not None else None
     
-    change_pressure = (press_now - avg[h]["avg_pressure"]) if press_now is not None else None
-    percent_change_pressure = (change_pressure / avg[h]["avg_pressure"] * 100) if change_pressure is not None else None
+    change_humi = (humi_now - avg_humi) if humi_now is not None and avg_humi is not None else None
+    percent_change_humi = (change_humi / avg_humi * 100) if change_humi is not None else None
     
-    return {
+    change_pressure = (press_now - avg_press) if press_now is not None and avg_press is not None else None
+    percent_change_pressure = (change_pressure / avg_press * 100) if change_pressure is not None else None
+    
+    changes = {
         'temp_change': change_temp,
         'temp_percent_change': percent_change_temp,
         'humidity_change': change_humi,
@@ -88,14 +113,78 @@ def calcn_change(data_now, avg):
         'pressure_percent_change': percent_change_pressure
     }
     
+    # Seasonal baseline: same day of year and hour across the whole archive
+    if climatology_index is not None:
+        seasonal = climatology.lookup(climatology_index, now)
+        for key, value, metric in (('temp', temp_now, 'temperature'),
+                                   ('humidity', humi_now, 'humidity'),
+                                   ('pressure', press_now, 'pressure')):
+            change, zscore = seasonal_change(value, seasonal[metric])
+            changes[f'{key}_seasonal_change'] = change
+            changes[f'{key}_seasonal_zscore'] = zscore
+    
+    return changes
+    
+
+def _finite_or_none(v):
+    v = float(v)
+    return v if np.isfinite(v) else None
+
+def calcn_derived(reading, timestamps, temps, humis, press):
+    """Derived metrics for the current reading, with dew point against its 30-day hourly mean"""
+    now = datetime.now()
+    temp_now = reading['temperature']
+    humi_now = reading['humidity']
+    press_now = reading['pressure']
+    
+    series = derived_metrics.derive(timestamps, temps, humis, press)
+    
+    derived = {
+        'dew_point': None,
+        'dew_point_change': None,
+        'heat_index': None,
+        'absolute_humidity': None,
+        'pressure_tendency': None,
+    }
+    
+    if temp_now is not None and humi_now is not None:
+        dew_now = _finite_or_none(derived_metrics.dew_point(temp_now, humi_now))
+        derived['dew_point'] = dew_now
+        derived['heat_index'] = _finite_or_none(derived_metrics.heat_index(temp_now, humi_now))
+        derived['absolute_humidity'] = _finite_or_none(derived_metrics.absolute_humidity(temp_now, humi_now))
+        
+        hours = timestamps.astype('datetime64[h]').astype(np.int64) % 24
+        same_hour = series['dew_point'][hours == now.hour]
+        same_hour = same_hour[np.isfinite(same_hour)]
+        if dew_now is not None and len(same_hour):
+            derived['dew_point_change'] = _finite_or_none(dew_now - same_hour.mean())
+    
+    if press_now is not None and len(timestamps):
+        # Only the last few hours matter for the tendency at "now"
+        now64 = np.datetime64(now, 'us')
+        start = np.searchsorted(timestamps, now64 - derived_metrics.TENDENCY_WINDOW - derived_metrics.TENDENCY_TOLERANCE)
+        recent = np.isfinite(press[start:])
+        tendency = derived_metrics.pressure_tendency(
+            np.append(timestamps[start:][recent], now64), np.append(press[start:][recent], press_now)
+        )
+        derived['pressure_tendency'] = _finite_or_none(tendency[-1])
+    
+    return derived
 
 async def main():
     data = await load_last_30_days_data()
-    avg = await get_hourly_average(data)
+    timestamps, temps, humis, press = rows_to_arrays(data)
+    avg = data_quality.hourly_average(timestamps, temps, humis, press)
     logging.info(avg)
-    data_now = fetch_data()
+    data_now = await fetch_data()
     logging.info(data_now)
-    changes = calcn_change(data_now, avg)
+    reading = data_quality.normalize_reading(data_now)
+    if all(v is None for v in reading.values()):
+        # Keep the last good 'changes' in Redis rather than overwriting it with nulls
+        raise RuntimeError(f"No usable values in sensor reading: {data_now}")
+    changes = calcn_change(reading, avg, climatology.open_index())
+    if changes is not None:
+        changes.update(calcn_derived(reading, timestamps, temps, humis, press))
     logging.info(changes)
 
     # Write changes into Redis as a JSON string so other services (e.g. alerts/scheduler.js)
@@ -0,0 +1,143 @@
+import asyncio
+import argparse
+import logging
+import os
+import sys
+import time
+
+import asyncpg
+from dotenv import load_dotenv
+from pg_store import asyncpg_dsn
+
+logging.basicConfig(level=logging.INFO)
+
+env_path = os.path.join(os.path.dirname(__file__), '.env')
+load_dotenv(dotenv_path=env_path)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Channel used by the notify_ingest() trigger (see the Ingest migrations)
+CHANNEL = 'skydelta_ingest'
+
+
+class Stage:
+    """One script that is re-run after new rows land, at most once per min_interval"""
+
+    def __init__(self, name, args, min_interval):
+        self.name = name
+        self.args = args
+        self.min_interval = min_interval
+        self.dirty = asyncio.Event()
+        self.last_run = 0.0
+
+    async def _settle(self, debounce, max_wait):
+        """Wait until notifications have been quiet for `debounce` seconds"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            self.dirty.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.dirty.wait(), min(debounce, remaining))
+            except asyncio.TimeoutError:
+                return
+
+    async def run_forever(self, debounce, max_wait):
+        while True:
+            await self.dirty.wait()
+            await self._settle(debounce, max_wait)
+
+            wait = self.last_run + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # Anything that arrived while waiting is covered by this run
+            self.dirty.clear()
+
+            self.last_run = time.monotonic()
+            logging.info(f"Running {self.name}")
+            proc = await asyncio.create_subprocess_exec(sys.executable, *self.args, cwd=DATA_DIR)
+            code = await proc.wait()
+            took = time.monotonic() - self.last_run
+            if code:
+                logging.error(f"{self.name} exited with {code} after {took:.1f}s")
+            else:
+                logging.info(f"{self.name} finished in {took:.1f}s")
+
+
+def build_stages(trends_interval=3600):
+    stages = {
+        # Its only consumer (alerts/scheduler.js) reads the result once an hour
+        'hourly-trends': Stage('hourly-trends', ['hourly-trends.py'], min_interval=trends_interval),
+        'fetch_avg_plots': Stage('fetch_avg_plots', ['fetch_avg_plots.py'], min_interval=60),
+        # Only has work to do once a day closes; otherwise a quick no-op
+        'climatology': Stage('climatology', ['climatology.py'], min_interval=3600),
+    }
+    # Which stages depend on which table. Nothing in Data reads pm25 yet, so
+    # its notifications are only logged.
+    affected = {
+        'weather_db_v2': [stages['hourly-trends'], stages['fetch_avg_plots'], stages['climatology']],
+        'pm25': [],
+    }
+    return stages, affected
+
+
+async def listen(dsn, affected):
+    """Mark stages dirty on every notification; reconnect if the connection drops"""
+    seen = {}
+
+    def on_notify(conn, pid, channel, table):
+        seen[table] = seen.get(table, 0) + 1
+        stages = affected.get(table)
+        if stages is None:
+            logging.warning(f"Notification for unknown table {table}")
+            return
+        for stage in stages:
+            stage.dirty.set()
+
+    while True:
+        closed = asyncio.Event()
+        try:
+            conn = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError) as e:
+            logging.warning(f"Connecting failed ({e}), retrying in 10s")
+            await asyncio.sleep(10)
+            continue
+
+        conn.add_termination_listener(lambda _: closed.set())
+        await conn.add_listener(CHANNEL, on_notify)
+        logging.info(f"Listening on '{CHANNEL}'")
+        try:
+            await closed.wait()
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+        logging.warning(f"Connection lost (notifications so far: {seen}), reconnecting")
+
+
+async def main(debounce, max_wait, trends_interval):
+    stages, affected = build_stages(trends_interval)
+    runners = [asyncio.create_task(stage.run_forever(debounce, max_wait)) for stage in stages.values()]
+
+    # Bring everything up to date once at startup, then follow the inserts
+    for stage in stages.values():
+        stage.dirty.set()
+
+    try:
+        await listen(asyncpg_dsn(os.environ['DATABASE_URL']), affected)
+    finally:
+        for task in runners:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute aggregates and plots when new rows are inserted")
+    parser.add_argument('--debounce', type=float, default=5.0,
+                        help="seconds without new notifications before a stage runs")
+    parser.add_argument('--max-wait', type=float, default=30.0,
+                        help="run anyway after this many seconds of continuous inserts")
+    parser.add_argument('--trends-interval', type=float, default=3600.0,
+                        help="minimum seconds between hourly-trends runs")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.debounce, args.max_wait, args.trends_interval))
@@ -0,0 +1,199 @@
+import sys
+import asyncio
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+try:
+    import asyncpg
+except ImportError:  # optional: only needed with DATA_DB_DRIVER=asyncpg
+    asyncpg = None
+
+env_path = os.path.join(os.path.dirname(__file__), '.env')
+load_dotenv(dotenv_path=env_path)
+
+# Mirrors Data/prisma/schema.prisma, which stays the source of truth
+TABLE_COLUMNS = {
+    'weather_db': ('id', 'timestamp', 'temperature', 'humidity'),
+    'weather_db_v2': ('id', 'timestamp', 'temperature', 'humidity', 'pressure'),
+    'pm25': ('id', 'timestamp', 'pm25'),
+}
+
+_OPS = {'equals': '=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+
+def enabled():
+    """True when the Data scripts should read through asyncpg instead of Prisma"""
+    if os.getenv('DATA_DB_DRIVER', 'prisma') != 'asyncpg':
+        return False
+    if asyncpg is None:
+        logging.warning("DATA_DB_DRIVER=asyncpg but asyncpg isn't installed, using Prisma")
+        return False
+    return True
+
+
+def asyncpg_dsn(url):
+    """Drop Prisma-only query parameters (e.g. ?schema=public) from DATABASE_URL"""
+    return urlunsplit(urlsplit(url)._replace(query=''))
+
+
+def _param(value):
+    # Prisma treats naive datetimes as UTC; asyncpg would assume local time
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _compile_where(where, columns, params):
+    """Translate the subset of Prisma `where` filters the Data scripts use into SQL"""
+    parts = []
+    for key, cond in where.items():
+        if key in ('AND', 'OR'):
+            sub = ['(' + _compile_where(w, columns, params) + ')' for w in cond]
+            parts.append('(' + f' {key} '.join(sub) + ')')
+        elif key in columns:
+            if not isinstance(cond, dict):
+                cond = {'equals': cond}
+            for op, value in cond.items():
+                if op not in _OPS:
+                    raise ValueError(f"Unsupported filter {key}.{op}")
+                params.append(_param(value))
+                parts.append(f'"{key}" {_OPS[op]} ${len(params)}')
+        else:
+            raise ValueError(f"Unknown column {key}")
+    return ' AND '.join(parts) if parts else 'TRUE'
+
+
+def _compile_order(order, columns):
+    if not order:
+        return ''
+    if isinstance(order, dict):
+        order = [order]
+    terms = []
+    for term in order:
+        for column, direction in term.items():
+            if column not in columns or direction not in ('asc', 'desc'):
+                raise ValueError(f"Unsupported order {column} {direction}")
+            terms.append(f'"{column}" {direction.upper()}')
+    return ' ORDER BY ' + ', '.join(terms)
+
+
+if asyncpg is not None:
+    class Row(asyncpg.Record):
+        """Record with attribute access, so rows read like Prisma models (row.timestamp)"""
+
+        def __getattr__(self, name):
+            try:
+                return self[name]
+            except KeyError:
+                raise AttributeError(name) from None
+
+
+class _Table:
+    """find_many / find_first / count for one table, compatible with the Prisma calls used in Data"""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.columns = TABLE_COLUMNS[name]
+
+    def _select(self, where, order, take, params):
+        cols = ', '.join(f'"{c}"' for c in self.columns)
+        sql = f'SELECT {cols} FROM "{self.name}" WHERE {_compile_where(where or {}, self.columns, params)}'
+        sql += _compile_order(order, self.columns)
+        if take is not None:
+            params.append(take)
+            sql += f' LIMIT ${len(params)}'
+        return sql
+
+    async def find_many(self, where=None, order=None, take=None):
+        params = []
+        sql = self._select(where, order, take, params)
+        # The SQL text only depends on the filter's shape, so pages of the same
+        # scan reuse one server-side prepared statement (asyncpg caches them)
+        return await self.store.pool.fetch(sql, *params)
+
+    async def find_first(self, where=None, order=None):
+        rows = await self.find_many(where=where, order=order, take=1)
+        return rows[0] if rows else None
+
+    async def count(self, where=None):
+        params = []
+        sql = f'SELECT COUNT(*) FROM "{self.name}" WHERE {_compile_where(where or {}, self.columns, params)}'
+        return await self.store.pool.fetchval(sql, *params)
+
+
+class PgStore:
+    """asyncpg connection pool exposing the read side of the Prisma client
+
+    Used as a drop-in for `Prisma()` on the read-heavy paths (connect,
+    disconnect, db.<table>.find_many, and therefore stream_rows), plus
+    binary COPY exports that Prisma can't do.
+    """
+
+    def __init__(self, dsn=None, min_size=1, max_size=4):
+        self.dsn = asyncpg_dsn(dsn or os.environ['DATABASE_URL'])
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+        for name in TABLE_COLUMNS:
+            setattr(self, name, _Table(self, name))
+
+    async def connect(self):
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size, record_class=Row,
+        )
+
+    async def disconnect(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def _range_query(self, table, start, end, params):
+        where = {'timestamp': {}}
+        if start is not None:
+            where['timestamp']['gte'] = start
+        if end is not None:
+            where['timestamp']['lt'] = end
+        return getattr(self, table)._select(where if where['timestamp'] else None,
+                                            [{'timestamp': 'asc'}, {'id': 'asc'}], None, params)
+
+    async def export_range(self, table, output, start=None, end=None, format='binary'):
+        """COPY rows with start <= timestamp < end to a path or file-like object
+
+        `format` is any COPY format ('binary', 'csv', 'text'). Returns the
+        COPY status string, e.g. 'COPY 43200'.
+        """
+        params = []
+        sql = self._range_query(table, start, end, params)
+        async with self.pool.acquire() as conn:
+            return await conn.copy_from_query(sql, *params, output=output, format=format)
+
+
+async def export_main(table, output, start, end, format):
+    store = PgStore()
+    await store.connect()
+    try:
+        status = await store.export_range(table, output, start, end, format)
+    finally:
+        await store.disconnect()
+    print(f"✓ {status} -> {output}")
+
+
+if __name__ == "__main__":
+    if asyncpg is None:
+        sys.exit("pg_store.py needs asyncpg (pip install asyncpg)")
+
+    parser = argparse.ArgumentParser(description="Export a table range with COPY ... TO STDOUT")
+    parser.add_argument('table', choices=sorted(TABLE_COLUMNS))
+    parser.add_argument('output', help="file to write")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="inclusive, ISO timestamp")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="exclusive, ISO timestamp")
+    parser.add_argument('--format', default='binary', choices=('binary', 'csv', 'text'))
+    args = parser.parse_args()
+
+    asyncio.run(export_main(args.table, args.output, args.start, args.end, args.format))
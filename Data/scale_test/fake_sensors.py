@@ -0,0 +1,56 @@
+import argparse
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import reading_at
+
+
+class FakeSensorHandler(BaseHTTPRequestHandler):
+    """Serves /sensors_v2 and /api with the same payload shapes as the real devices"""
+
+    def do_GET(self):
+        weather, pm25 = reading_at(datetime.now())
+        path = self.path.split('?')[0]
+        if path == '/sensors_v2':
+            body = weather
+        elif path == '/api':
+            body = pm25
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        # The alert endpoints on the devices just accept whatever is sent
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host='127.0.0.1', port=0):
+    """Run the fake sensors in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), FakeSensorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake /sensors_v2 and /api endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8051)
+    args = parser.parse_args()
+
+    print(f"Fake sensors on http://{args.host}:{args.port} (/sensors_v2, /api)")
+    ThreadingHTTPServer((args.host, args.port), FakeSensorHandler).serve_forever()
@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import fake_sensors
+from synthetic import generate, WEATHER_COLUMNS, PM25_COLUMNS
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = DATA_DIR.parent / "Ingest" / "prisma" / "migrations"
+
+TABLES = {
+    'weather_db_v2': WEATHER_COLUMNS,
+    'pm25': PM25_COLUMNS,
+}
+
+
+def _libpq_url(url):
+    """Drop Prisma-only query parameters (e.g. ?schema=public) that psql rejects"""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(query=''))
+
+
+def psql(url, sql):
+    result = subprocess.run(
+        ['psql', _libpq_url(url), '-v', 'ON_ERROR_STOP=1', '-qAt', '-c', sql],
+        check=True, capture_output=True, text=True,
+    )
+    return result.stdout.strip()
+
+
+def ensure_schema(url):
+    """Apply the Ingest migrations to an empty database"""
+    if psql(url, "SELECT to_regclass('weather_db_v2') IS NOT NULL") == 't':
+        return
+    for migration in sorted(MIGRATIONS_DIR.glob("*/migration.sql")):
+        subprocess.run(['psql', _libpq_url(url), '-v', 'ON_ERROR_STOP=1', '-q', '-f', str(migration)],
+                       check=True)
+
+
+def load(url, days, tables, seed):
+    """Replace the tables' contents with `days` of synthetic data via COPY"""
+    psql(url, f"TRUNCATE {', '.join(TABLES)}")
+    for table in tables:
+        started = time.perf_counter()
+        columns = ', '.join(f'"{c}"' for c in TABLES[table])
+        copy = subprocess.Popen(
+            ['psql', _libpq_url(url), '-v', 'ON_ERROR_STOP=1', '-q',
+             '-c', f"\\copy {table} ({columns}) FROM STDIN WITH (FORMAT csv)"],
+            stdin=subprocess.PIPE, text=True,
+        )
+        rows = 0
+        for line in generate(table, days, seed=seed):
+            copy.stdin.write(line)
+            rows += 1
+        copy.stdin.close()
+        if copy.wait() != 0:
+            raise RuntimeError(f"COPY into {table} failed")
+        print(f"  loaded {rows} {table} rows in {time.perf_counter() - started:.1f}s")
+    psql(url, "ANALYZE")
+
+
+def rows_read(url):
+    """Tuples read from the weather tables so far (sequential + index fetches)"""
+    names = ', '.join(f"'{t}'" for t in TABLES)
+    return int(psql(url, f"SELECT COALESCE(SUM(seq_tup_read), 0) + COALESCE(SUM(idx_tup_fetch), 0) "
+                         f"FROM pg_stat_user_tables WHERE relname IN ({names})"))
+
+
+def run_stage(cmd, env, log):
+    """Run one script; returns (exit code, seconds, peak RSS in MB of its process tree)"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, cwd=DATA_DIR, stdout=log, stderr=subprocess.STDOUT)
+    # wait4 reports the max RSS over the child and the children it waited for
+    # (e.g. the Prisma query engine), which Popen.wait() would throw away
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, time.perf_counter() - started, usage.ru_maxrss / 1024
+
+
+def main(url, scales, tables, seed, repeat):
+    ensure_schema(url)
+    server, sensors_url = fake_sensors.start()
+    output_dir = tempfile.mkdtemp(prefix="skydelta-scale-")
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = url
+    env['SENSOR_PROXY_URL'] = f"{sensors_url}/sensors_v2"
+    env['SENSORS_V2_URL'] = f"{sensors_url}/sensors_v2"
+    env['PM25_SENSOR_URL'] = f"{sensors_url}/api"
+
+    stages = {
+        'hourly-trends': [sys.executable, str(DATA_DIR / "hourly-trends.py")],
+        'fetch_avg_plots': [sys.executable, str(DATA_DIR / "fetch_avg_plots.py"), '--output-dir', output_dir],
+    }
+
+    results = []
+    with open(os.path.join(output_dir, 'stages.log'), 'w') as log:
+        for days in scales:
+            print(f"\n=== {days} days ===")
+            load(url, days, tables, seed)
+            for name, cmd in stages.items():
+                for run in range(repeat):
+                    # A fresh cache dir per run: every run measures the cold path, and
+                    # nothing built from synthetic rows leaks into Data/cache
+                    env['SKYDELTA_CACHE_DIR'] = os.path.join(output_dir, 'cache', f"{days}d-{name}-{run}")
+                    # Stats are flushed asynchronously; give them a moment either side
+                    time.sleep(1)
+                    before = rows_read(url)
+                    code, seconds, peak_mb = run_stage(cmd, env, log)
+                    time.sleep(1)
+                    read = rows_read(url) - before
+                    results.append({'days': days, 'stage': name, 'exit': code,
+                                    'seconds': round(seconds, 2), 'rows_read': read,
+                                    'peak_mb': round(peak_mb, 1)})
+                    print(f"  {name:<16} exit={code} {seconds:7.2f}s {read:>10} rows read {peak_mb:7.1f} MB")
+
+    server.shutdown()
+    print(f"\nPlots and script output in {output_dir}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load synthetic history into a scratch Postgres and time the Data scripts against it"
+    )
+    parser.add_argument('--database-url', required=True,
+                        help="scratch database; its weather_db_v2 and pm25 tables are TRUNCATED")
+    parser.add_argument('--scales', type=int, nargs='+', default=[30, 365, 1825],
+                        help="days of history to test with")
+    parser.add_argument('--no-pm25', action='store_true', help="skip the (large) 5-second pm25 table")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage at each scale")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    tables = ['weather_db_v2'] if args.no_pm25 else list(TABLES)
+    results = main(args.database_url, args.scales, tables, args.seed, args.repeat)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
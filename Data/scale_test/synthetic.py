@@ -0,0 +1,115 @@
+import argparse
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+
+# Ingest rates from Ingest/main.js
+WEATHER_STEP = timedelta(minutes=1)
+PM25_STEP = timedelta(seconds=5)
+
+WEATHER_COLUMNS = ('id', 'timestamp', 'temperature', 'humidity', 'pressure')
+PM25_COLUMNS = ('id', 'timestamp', 'pm25')
+
+
+def _hours(stamps):
+    """Fractional hour of day, day of year and absolute days for datetime64 stamps"""
+    minutes = stamps.astype('datetime64[m]').astype(np.int64)
+    hour = (minutes % 1440) / 60
+    day_of_year = (stamps.astype('datetime64[D]') - stamps.astype('datetime64[Y]')).astype(np.int64)
+    return hour, day_of_year, minutes / 1440
+
+
+def weather_values(stamps, rng):
+    """Temperature, humidity and pressure with diurnal, seasonal and weather-scale cycles"""
+    hour, doy, days = _hours(stamps)
+    n = len(stamps)
+
+    # Warmest mid-afternoon, coolest just before sunrise; warmest in May
+    seasonal = 4.0 * np.cos(2 * np.pi * (doy - 135) / 365)
+    diurnal = 4.5 * np.sin(2 * np.pi * (hour - 9) / 24)
+    # Multi-day drift (fronts, cloudy spells); a function of absolute time so
+    # it stays continuous across the day-sized chunks the data is built in
+    drift = 1.5 * np.sin(2 * np.pi * days / 4.1 + 0.7) + 0.8 * np.sin(2 * np.pi * days / 9.7 + 2.1)
+    temperature = 27.0 + seasonal + diurnal + drift + rng.normal(0, 0.15, n)
+
+    # Relative humidity runs opposite to temperature, wetter in the monsoon
+    monsoon = 20.0 * np.exp(-((doy - 200) / 45.0) ** 2)
+    humidity = 55.0 + monsoon - 2.2 * (diurnal + drift) + rng.normal(0, 1.0, n)
+    humidity = np.clip(humidity, 5, 100)
+
+    # Semidiurnal atmospheric tide (peaks ~10:00 and ~22:00) plus synoptic swings
+    tide = 1.2 * np.cos(2 * np.pi * (hour - 10) / 12)
+    synoptic = 2.5 * np.sin(2 * np.pi * days / 5.3) - 2.0 * np.cos(2 * np.pi * (doy - 135) / 365)
+    pressure = 1010.0 + tide + synoptic + rng.normal(0, 0.05, n)
+
+    return (np.round(temperature, 2), np.round(humidity, 2), np.round(pressure, 2))
+
+
+def pm25_values(stamps, rng):
+    """PM2.5 with rush-hour peaks, a dry-season bias and heavy-tailed noise"""
+    hour, doy, _ = _hours(stamps)
+    n = len(stamps)
+
+    rush = 25 * np.exp(-((hour - 9) / 1.5) ** 2) + 35 * np.exp(-((hour - 20) / 2.0) ** 2)
+    winter = 30 * (1 + np.cos(2 * np.pi * (doy - 15) / 365)) / 2
+    noise = rng.lognormal(0, 0.35, n)
+    return np.round((20 + rush + winter) * noise, 1)
+
+
+def _daily_stamps(day_start, step, until):
+    end = min(day_start + timedelta(days=1), until)
+    return np.arange(np.datetime64(day_start), np.datetime64(end), np.timedelta64(step))
+
+
+def generate(table, days, end=None, seed=0):
+    """Yield CSV lines for `days` of data up to `end`, one day at a time
+
+    Timestamps are IST wall-clock times, the way Ingest/main.js stores them.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now().replace(second=0, microsecond=0)
+    start = datetime.combine((end - timedelta(days=days)).date(), datetime.min.time())
+    step = WEATHER_STEP if table == 'weather_db_v2' else PM25_STEP
+
+    n = 0
+    day = start
+    while day < end:
+        stamps = _daily_stamps(day, step, end)
+        text = np.datetime_as_string(stamps, unit='s')
+        if table == 'weather_db_v2':
+            columns = weather_values(stamps, rng)
+        else:
+            columns = (pm25_values(stamps, rng),)
+        for i, ts in enumerate(text):
+            values = ','.join(str(c[i]) for c in columns)
+            yield f"synthetic-{n + i},{ts}+00:00,{values}\n"
+        n += len(stamps)
+        day += timedelta(days=1)
+
+
+def reading_at(when, rng=None):
+    """A single /sensors_v2 and /api payload for the given moment"""
+    rng = rng or np.random.default_rng()
+    stamps = np.array([np.datetime64(when, 's')])
+    temperature, humidity, pressure = (float(v[0]) for v in weather_values(stamps, rng))
+    return {
+        'ok': True,
+        'temp_c': temperature,
+        'pressure_hpa': pressure,
+        'humidity_pct': humidity,
+        'light_lux': 100,
+        'alert': 'green',
+        'ip': '127.0.0.1',
+    }, {
+        'pm25': float(pm25_values(stamps, rng)[0]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic rows as CSV to stdout")
+    parser.add_argument('table', choices=('weather_db_v2', 'pm25'))
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sys.stdout.writelines(generate(args.table, args.days, seed=args.seed))
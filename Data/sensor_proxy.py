@@ -0,0 +1,184 @@
+import asyncio
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+
+# Local path -> upstream device endpoint, seconds between background polls,
+# how old a cached reading may be before a request refreshes it, and how old
+# it may get (while the device is failing) before the proxy refuses to serve
+# it rather than hand out the same stale reading as if it were new. The
+# weather device is polled at Ingest/main.js's one-minute cadence so the proxy
+# never adds traffic to it; the PM2.5 sensor is cheap to read and changes fast.
+DEVICES = {
+    '/sensors_v2': {
+        'url': os.getenv('SENSORS_V2_URL', 'http://192.168.1.50/sensors_v2'),
+        'interval': 60.0,
+        'max_age': 60.0,
+        'stale_after': 180.0,
+    },
+    '/api': {
+        'url': os.getenv('PM25_SENSOR_URL', 'http://192.168.1.45/api'),
+        'interval': 5.0,
+        'max_age': 10.0,
+        'stale_after': 30.0,
+    },
+}
+
+PROXY_HOST = os.getenv('SENSOR_PROXY_HOST', '127.0.0.1')
+PROXY_PORT = int(os.getenv('SENSOR_PROXY_PORT', '8050'))
+
+
+class StaleReading(Exception):
+    """The device is failing and the last good reading is too old to serve"""
+
+
+class SensorCache:
+    """Latest reading of one device, refreshed by a single upstream call at a time"""
+
+    def __init__(self, client, url, max_age, stale_after):
+        self.client = client
+        self.url = url
+        self.max_age = max_age
+        self.stale_after = stale_after
+        self.reading = None
+        self.fetched_at = None
+        self.fetched_at_wall = None
+        self._inflight = None
+
+    def age(self):
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+    async def _fetch(self):
+        res = await self.client.get(self.url)
+        res.raise_for_status()
+        self.reading = res.json()
+        self.fetched_at = time.monotonic()
+        self.fetched_at_wall = datetime.now()
+        return self.reading
+
+    def _clear_inflight(self, _):
+        self._inflight = None
+
+    async def refresh(self):
+        """Fetch from the device, joining a fetch that is already in flight"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone
+        return await asyncio.shield(self._inflight)
+
+    async def get(self):
+        """Return the cached reading, refreshing it only once it is stale"""
+        age = self.age()
+        if age is not None and age <= self.max_age:
+            return self.reading
+        try:
+            return await self.refresh()
+        except (httpx.HTTPError, ValueError) as e:
+            if self.reading is None:
+                raise
+            age = self.age()
+            if age > self.stale_after:
+                raise StaleReading(f"{self.url} failing ({e}), last reading is {age:.0f}s old") from e
+            logging.warning(f"Refresh of {self.url} failed ({e}), serving reading aged {age:.1f}s")
+            return self.reading
+
+    async def poll_forever(self, interval):
+        while True:
+            try:
+                await self.refresh()
+            except (httpx.HTTPError, ValueError) as e:
+                logging.warning(f"Polling {self.url} failed: {e}")
+            await asyncio.sleep(interval)
+
+
+def _response(status, reason, body, headers=None):
+    payload = json.dumps(body).encode()
+    lines = [
+        f"HTTP/1.1 {status} {reason}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+    ]
+    for key, value in (headers or {}).items():
+        lines.append(f"{key}: {value}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + payload
+
+
+async def handle_client(caches, reader, writer):
+    """Serve cached readings over a minimal keep-alive HTTP/1.1 loop"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                    keep_alive = False
+
+            parts = request_line.decode(errors='replace').split()
+            method, path = (parts[0], parts[1].split('?')[0]) if len(parts) >= 2 else ('', '')
+            cache = caches.get(path)
+
+            if method != 'GET' or cache is None:
+                writer.write(_response(404, "Not Found", {'error': 'unknown sensor path'}))
+            else:
+                try:
+                    reading = await cache.get()
+                    writer.write(_response(200, "OK", reading, {
+                        'X-Fetched-At': cache.fetched_at_wall.isoformat(),
+                        'X-Cache-Age': f"{cache.age():.3f}",
+                    }))
+                except StaleReading as e:
+                    writer.write(_response(503, "Service Unavailable", {'error': str(e)}))
+                except (httpx.HTTPError, ValueError) as e:
+                    writer.write(_response(502, "Bad Gateway", {'error': str(e)}))
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def main(host, port):
+    limits = httpx.Limits(max_connections=len(DEVICES), max_keepalive_connections=len(DEVICES))
+    async with httpx.AsyncClient(timeout=2, limits=limits) as client:
+        caches = {path: SensorCache(client, device['url'], device['max_age'], device['stale_after'])
+                  for path, device in DEVICES.items()}
+        pollers = [asyncio.create_task(caches[path].poll_forever(device['interval']))
+                   for path, device in DEVICES.items()]
+
+        server = await asyncio.start_server(
+            lambda r, w: handle_client(caches, r, w), host, port
+        )
+        logging.info(f"Sensor proxy listening on http://{host}:{port} ({', '.join(DEVICES)})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in pollers:
+                task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll local sensors once and serve the latest reading")
+    parser.add_argument('--host', default=PROXY_HOST)
+    parser.add_argument('--port', type=int, default=PROXY_PORT)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.host, args.port))
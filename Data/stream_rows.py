@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+# Add the parent directory to Python path to import generated prisma client
+sys.path.insert(0, str(Path(__file__).parent / "generated"))
+
+import asyncio
+import inspect
+
+# Rows per page. Memory held by a stream is bounded by roughly two pages
+# (the one being processed and, with prefetch, the one being fetched).
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _keyset_where(where, cursor, descending):
+    """Combine the caller's filter with the (timestamp, id) keyset cursor"""
+    if cursor is None:
+        return where or {}
+
+    last_ts, last_id = cursor
+    op = 'lt' if descending else 'gt'
+    # ts >= x AND (ts > x OR id > y): the leading bound on timestamp lets
+    # Postgres start from the (timestamp, id) index instead of scanning
+    after_cursor = {
+        'timestamp': {op + 'e': last_ts},
+        'OR': [
+            {'timestamp': {op: last_ts}},
+            {'id': {op: last_id}},
+        ],
+    }
+    if where:
+        return {'AND': [where, after_cursor]}
+    return after_cursor
+
+
+async def _fetch_page(model, where, cursor, chunk_size, descending):
+    direction = 'desc' if descending else 'asc'
+    return await model.find_many(
+        where=_keyset_where(where, cursor, descending),
+        order=[
+            {'timestamp': direction},
+            {'id': direction},
+        ],
+        take=chunk_size,
+    )
+
+
+async def stream_chunks(db, table, where=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                        process=None, prefetch=False, descending=False, after=None):
+    """Stream a table in fixed-size pages ordered by (timestamp, id)
+
+    `db` must already be connected. `table` is the Prisma model name
+    (e.g. 'weather_db_v2' or 'pm25'). If `process` is given it is called
+    on every page (sync or async) and its result is yielded instead of the
+    raw rows. With `prefetch=True` the next page is requested while the
+    caller is still working on the current one. `after` is an optional
+    (timestamp, id) cursor to resume from, e.g. the last row already seen.
+    """
+    model = getattr(db, table)
+    cursor = after
+    pending = None
+
+    try:
+        while True:
+            if pending is not None:
+                rows = await pending
+                pending = None
+            else:
+                rows = await _fetch_page(model, where, cursor, chunk_size, descending)
+
+            if not rows:
+                return
+
+            last = rows[-1]
+            cursor = (last.timestamp, last.id)
+            has_more = len(rows) == chunk_size
+
+            if prefetch and has_more:
+                pending = asyncio.ensure_future(
+                    _fetch_page(model, where, cursor, chunk_size, descending)
+                )
+
+            if process is not None:
+                result = process(rows)
+                if inspect.isawaitable(result):
+                    result = await result
+                yield result
+            else:
+                yield rows
+
+            if not has_more:
+                return
+    finally:
+        # Don't leave a prefetch running if the consumer stopped early
+        if pending is not None:
+            pending.cancel()
+
+
+async def stream_rows(db, table, where=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                      prefetch=False, descending=False, after=None):
+    """Stream a table row by row, fetching it page by page"""
+    async for rows in stream_chunks(db, table, where=where, chunk_size=chunk_size,
+                                    prefetch=prefetch, descending=descending, after=after):
+        for row in rows:
+            yield row
@@ -4,13 +4,21 @@ dotenv.config();
 import { PrismaClient } from "@prisma/client";
 const prisma = new PrismaClient();
 
+// Point these at the local sensor proxy (Data/sensor_proxy.py) to share one
+// device poll between every consumer.
+const PM25_URL = process.env.PM25_PROXY_URL ?? "http://192.168.1.45/api";
+const SENSORS_V2_URL =
+  process.env.SENSOR_PROXY_URL ?? "http://192.168.1.50/sensors_v2";
+
 async function fetchAndStorePollution() {
   try {
     console.log("[SERVER] Server Started");
     console.info("[FETCH] Fetching started");
-    const res = await fetch("http://192.168.1.45/api", {
+    const res = await fetch(PM25_URL, {
       signal: AbortSignal.timeout(2000),
     });
+    // The proxy answers 502/503 when the device is down or its reading is stale
+    if (!res.ok) throw new Error(`HTTP ${res.status} from ${PM25_URL}`);
     const data = await res.json();
     const now = new Date();
     const istTime = new Date(
@@ -34,9 +42,11 @@ async function fetchAndStore() {
   try {
     console.info("[SERVER] Server started");
     console.info("[FETCH] Fetching started");
-    const res = await fetch("http://192.168.1.50/sensors_v2", {
+    const res = await fetch(SENSORS_V2_URL, {
       signal: AbortSignal.timeout(2000),
     });
+    // The proxy answers 502/503 when the device is down or its reading is stale
+    if (!res.ok) throw new Error(`HTTP ${res.status} from ${SENSORS_V2_URL}`);
     const data = await res.json();
 
     // Get current time and manually format as IST
@@ -0,0 +1,19 @@
+-- CreateFunction
+-- One NOTIFY per INSERT statement, with the table name as payload, so the
+-- Data listener (Data/ingest_listener.py) only recomputes when rows arrive.
+CREATE OR REPLACE FUNCTION "notify_ingest"() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('skydelta_ingest', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "weather_db_v2_notify_ingest"
+    AFTER INSERT ON "weather_db_v2"
+    FOR EACH STATEMENT EXECUTE FUNCTION "notify_ingest"();
+
+-- CreateTrigger
+CREATE TRIGGER "pm25_notify_ingest"
+    AFTER INSERT ON "pm25"
+    FOR EACH STATEMENT EXECUTE FUNCTION "notify_ingest"();
@@ -0,0 +1,7 @@
+-- CreateIndex
+-- Keyset pagination (Data/stream_rows.py) walks the tables in
+-- (timestamp, id) order; without this every page is a full scan and sort.
+CREATE INDEX "weather_db_v2_timestamp_id_idx" ON "weather_db_v2"("timestamp", "id");
+
+-- CreateIndex
+CREATE INDEX "pm25_timestamp_id_idx" ON "pm25"("timestamp", "id");
@@ -6,6 +6,10 @@ import { openai } from "@ai-sdk/openai";
 import { generateObject } from "ai";
 import { z } from "zod";
 
+// Point at the local sensor proxy (Data/sensor_proxy.py) to avoid polling the device again
+const SENSORS_V2_URL =
+  process.env.SENSOR_PROXY_URL ?? "http://192.168.1.50/sensors_v2";
+
 const client = createClient();
 
 client.on("error", (err) => console.error("Redis Client Error", err));
@@ -87,7 +91,7 @@ const worker = new Worker(
       // Weather Index Job
       const value = await client.get("changes");
       const changes = JSON.parse(value);
-      const res = await fetch("http://192.168.1.50/sensors_v2");
+      const res = await fetch(SENSORS_V2_URL);
       const curData = await res.json();
       const { object } = await generateObject({
         model: openai("gpt-4.1-mini"),
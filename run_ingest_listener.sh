@@ -0,0 +1,5 @@
+#!/bin/bash
+
+. /home/aneesh/Desktop/Code/SkyDelta/.venv/bin/activate
+cd /home/aneesh/Desktop/Code/SkyDelta/Data
+python /home/aneesh/Desktop/Code/SkyDelta/Data/ingest_listener.py